@@ -1,9 +1,17 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import joblib
 import os
 import re
+import json
+import time
+import hashlib
+import sys
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# pandas, numpy e joblib (e, via unpickling do modelo, lightgbm/scikit-learn) são importados
+# apenas dentro das funções que os usam, para que o esqueleto da página seja exibido antes.
 
 #  Configuração da Página
 st.set_page_config(layout="wide", page_title="Painel de Recrutamento e Seleção")
@@ -11,47 +19,66 @@ st.set_page_config(layout="wide", page_title="Painel de Recrutamento e Seleção
 # ---------------------------------------------------------------------------
 # **1. Funções Utilitárias de Carregamento**
 # ---------------------------------------------------------------------------
+# Executadas em threads de segundo plano: erros são propagados e exibidos no status de carregamento.
 
-@st.cache_resource
 def carregar_arquivo_modelo(caminho):
-    try:
-        return joblib.load(caminho)
-    except FileNotFoundError:
-        st.error(f"Modelo não encontrado em '{caminho}'. Verifique o caminho.")
-    except Exception as e:
-        st.error(f"Erro ao carregar o modelo: {e}")
-    return None
+    import joblib
+
+    return joblib.load(caminho)
+
 
+def carregar_dataframe(caminho_dados, arquivo_nome, colunas_excluidas=()):
+    import pandas as pd
 
-@st.cache_data
-def carregar_dataframe(caminho_dados, arquivo_nome):
     path_completo = os.path.join(caminho_dados, arquivo_nome)
-    try:
+    if colunas_excluidas:
+        df = pd.read_csv(path_completo, usecols=lambda coluna: coluna not in colunas_excluidas)
+    else:
         df = pd.read_csv(path_completo)
 
-        if "id_vaga" in df.columns:
-            df["id_vaga"] = df["id_vaga"].astype(str)
-        if "id_candidato" in df.columns:
-            df["id_candidato"] = df["id_candidato"].astype(str)
-
-        return df
-    except FileNotFoundError:
-        st.error(f"Erro: '{arquivo_nome}' não localizado em {path_completo}.")
-    except Exception as e:
-        st.error(f"Erro ao carregar '{arquivo_nome}': {e}")
+    if "id_vaga" in df.columns:
+        df["id_vaga"] = df["id_vaga"].astype(str)
+    if "id_candidato" in df.columns:
+        df["id_candidato"] = df["id_candidato"].astype(str)
+    if "id_cluster_perfil" in df.columns:
+        df["id_cluster_perfil"] = df["id_cluster_perfil"].astype(str)
 
-    return pd.DataFrame()
+    return df
 
 
-@st.cache_data
 def carregar_artefato(arquivo_artefato_path):
-    try:
-        return joblib.load(arquivo_artefato_path)
-    except FileNotFoundError:
-        st.error(f"Erro: '{arquivo_artefato_path}' ausente.")
-    except Exception as e:
-        st.error(f"Erro carregando artefato: {e}")
-    return None
+    import joblib
+
+    return joblib.load(arquivo_artefato_path)
+
+
+def carregar_artefato_opcional(arquivo_artefato_path):
+    # None quando o pipeline não gerou o artefato (ex.: vocabulário TF-IDF de versões antigas)
+    if not os.path.exists(arquivo_artefato_path):
+        return None
+    return carregar_artefato(arquivo_artefato_path)
+
+
+def anexar_matriz_compartilhada(diretorio, nome):
+    import numpy as np
+    import pandas as pd
+
+    # Anexa somente leitura (zero-cópia) a matriz publicada pelo pipeline; None se não houver publicação
+    caminho_meta = os.path.join(diretorio, f"{nome}_meta.json")
+    if not os.path.exists(caminho_meta):
+        return None
+    with open(caminho_meta, 'r', encoding='utf-8') as arquivo:
+        meta = json.load(arquivo)
+    ids = np.load(os.path.join(diretorio, f"{nome}_ids.npy"), mmap_mode='r')
+    # Mapa id -> linha construído uma única vez por anexação (e não a cada lote de explicações)
+    posicoes = pd.Series(np.arange(len(ids)), index=pd.Index(ids, dtype=str))
+    return {
+        'colunas': meta['colunas'],
+        'col_id': meta['col_id'],
+        'matriz': np.load(os.path.join(diretorio, f"{nome}_matriz.npy"), mmap_mode='r'),
+        'ids': ids,
+        'posicoes': posicoes[~posicoes.index.duplicated()],
+    }
 
 
 # ---------------------------------------------------------------------------
@@ -59,65 +86,1064 @@ def carregar_artefato(arquivo_artefato_path):
 # ---------------------------------------------------------------------------
 DIRETORIO_DADOS = 'data/'
 DIRETORIO_ARTEFATOS = 'artifacts/'
+COLUNAS_FILTRO_VAGAS = ['categoria_vaga', 'modalidade_trabalho', 'nivel_profissional_vaga']
+TAMANHO_CACHE_FILTROS = 256
+CAMINHO_MODELO = os.path.join(DIRETORIO_ARTEFATOS, 'modelo_recrutamento_rf.joblib')
+CAMINHO_VOCABULARIO_TFIDF = os.path.join(DIRETORIO_ARTEFATOS, 'vocabulario_tfidf.joblib')
+CAMINHO_VETORES_TFIDF = os.path.join(DIRETORIO_ARTEFATOS, 'cache_vetores_tfidf.joblib')
+CAMINHOS_DADOS = [os.path.join(DIRETORIO_DADOS, 'vagas_processadas.csv'),
+                  os.path.join(DIRETORIO_DADOS, 'candidatos_processados.csv')]
+DIRETORIO_COMPARTILHADO = os.path.join(DIRETORIO_ARTEFATOS, 'compartilhado')
+CAMINHO_VISUALIZACOES = os.path.join('logs', 'visualizacoes_vagas.jsonl')
+LIMITE_BYTES_CACHE_RANKINGS = 64 * 1024 * 1024
+TOP_VAGAS_AQUECIMENTO = 20
+AQUECER_RANKINGS = os.environ.get('PAINEL_AQUECER_RANKINGS', '0') == '1'
+TAMANHO_PAGINA_PADRAO = 50
+LIMITE_ENTRADAS_CACHE_PAGINAS = 512
+LIMITE_BYTES_CACHE_PAGINAS = 64 * 1024 * 1024
+TOP_K_EXPLICACOES = 10
+LIMITE_ENTRADAS_CACHE_EXPLICACOES = 5000
+INTERVALO_ATUALIZACAO_EXPLICACOES_S = 1.0
+# Campos originais cujas colunas one-hot (pd.get_dummies) são reagregadas nas explicações
+CAMPOS_CATEGORICOS_MODELO = ['categoria_vaga', 'modalidade_trabalho', 'nivel_profissional_vaga', 'nivel_academico_vaga',
+                             'categoria_profissional', 'nivel_academico_padronizado', 'nivel_profissional']
+DIAGNOSTICO_PADRAO = os.environ.get('PAINEL_DIAGNOSTICO', '0') == '1'
+CAMINHO_LOG_DIAGNOSTICO = os.environ.get('PAINEL_LOG_DIAGNOSTICO', os.path.join('logs', 'diagnostico_painel.jsonl'))
+LIMITE_BYTES_LOG_DIAGNOSTICO = 5 * 1024 * 1024
+# Artefatos opcionais: em caso de falha o painel segue com o CSV completo (apenas um aviso é exibido)
+ARTEFATOS_OPCIONAIS = {'matriz_vagas', 'matriz_candidatos', 'vocabulario_tfidf', 'vetores_tfidf'}
+MENSAGENS_ERRO_CARREGAMENTO = {
+    'modelo': "Erro ao carregar o modelo",
+    'colunas_treinamento': "Erro carregando artefato 'colunas_modelo.joblib'",
+    'artefatos_engenharia': "Erro carregando artefato 'artefatos_engenharia.joblib'",
+    'matriz_vagas': "Matriz compartilhada 'vagas' indisponível",
+    'matriz_candidatos': "Matriz compartilhada 'candidatos' indisponível",
+    'vocabulario_tfidf': "Vocabulário TF-IDF indisponível",
+    'vetores_tfidf': "Cache de vetores TF-IDF indisponível",
+    'vagas': "Erro ao carregar 'vagas_processadas.csv'",
+    'candidatos': "Erro ao carregar 'candidatos_processados.csv'",
+}
+
+
+# ---------------------------------------------------------------------------
+# **2.1 Índice de Filtros (bitmaps por valor de categoria)**
+# ---------------------------------------------------------------------------
+
+@st.cache_resource(max_entries=2)
+def construir_indice_filtros(chave_dados, _vagas_df, colunas_filtro=tuple(COLUNAS_FILTRO_VAGAS)):
+    import numpy as np
+    import pandas as pd
+
+    registrar_evento_cache('construir_indice_filtros', 'faltas')
+    # Construído uma única vez por processo: um bitmap (np.packbits) por valor de cada coluna filtrável
+    total_linhas = len(_vagas_df)
+    bitmaps = {}
+    opcoes = {}
+    for coluna in colunas_filtro:
+        if coluna not in _vagas_df.columns:
+            continue
+        codigos, valores = pd.factorize(_vagas_df[coluna])
+        bitmaps[coluna] = {valor: np.packbits(codigos == codigo) for codigo, valor in enumerate(valores)}
+        opcoes[coluna] = list(valores)
+
+    return {
+        'chave_dados': chave_dados,
+        'total_linhas': total_linhas,
+        'bitmaps': bitmaps,
+        'opcoes': opcoes,
+        'ids_vaga': _vagas_df['id_vaga'].to_numpy() if 'id_vaga' in _vagas_df.columns else np.array([]),
+        'cache': OrderedDict(),
+        'acertos': 0,
+        'faltas': 0,
+        'trava': threading.Lock(),
+    }
+
+
+def filtrar_posicoes_vagas(indice, filtros, tamanho_cache=TAMANHO_CACHE_FILTROS):
+    import numpy as np
+
+    # filtros: {coluna: valores selecionados}; OR entre valores da mesma coluna, AND entre colunas
+    chave = tuple(
+        (coluna, tuple(sorted(map(str, valores))))
+        for coluna, valores in sorted(filtros.items()) if valores and coluna in indice['bitmaps']
+    )
+    with indice['trava']:
+        if chave in indice['cache']:
+            indice['acertos'] += 1
+            indice['cache'].move_to_end(chave)
+            return indice['cache'][chave]
+        indice['faltas'] += 1
+
+    bitmap_final = None
+    for coluna, valores in filtros.items():
+        if not valores or coluna not in indice['bitmaps']:
+            continue
+        bitmaps_coluna = indice['bitmaps'][coluna]
+        bitmap_coluna = np.zeros((indice['total_linhas'] + 7) // 8, dtype=np.uint8)
+        for valor in valores:
+            if valor in bitmaps_coluna:
+                bitmap_coluna |= bitmaps_coluna[valor]
+        bitmap_final = bitmap_coluna if bitmap_final is None else bitmap_final & bitmap_coluna
+
+    if bitmap_final is None:
+        posicoes = np.arange(indice['total_linhas'])
+    else:
+        posicoes = np.flatnonzero(np.unpackbits(bitmap_final, count=indice['total_linhas']))
+
+    with indice['trava']:
+        indice['cache'][chave] = posicoes
+        indice['cache'].move_to_end(chave)
+        while len(indice['cache']) > tamanho_cache:
+            indice['cache'].popitem(last=False)
+    return posicoes
+
+
+# ---------------------------------------------------------------------------
+# **2.2 Cache de Rankings por Vaga (compartilhado entre sessões)**
+# ---------------------------------------------------------------------------
+
+def versao_arquivos(caminhos):
+    # Versão derivada de data de modificação e tamanho: muda sempre que um artefato é regravado
+    partes = []
+    for caminho in caminhos:
+        try:
+            info = os.stat(caminho)
+            partes.append(f"{info.st_mtime_ns}-{info.st_size}")
+        except OSError:
+            partes.append("ausente")
+    return "|".join(partes)
+
+
+def carregar_visualizacoes(caminho=CAMINHO_VISUALIZACOES):
+    # Soma os incrementos gravados por todos os processos (uma linha JSON por lote de visualizações)
+    visualizacoes = Counter()
+    try:
+        with open(caminho, 'r', encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                try:
+                    visualizacoes.update(json.loads(linha))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return visualizacoes
+
+
+def salvar_visualizacoes(incrementos, caminho=CAMINHO_VISUALIZACOES):
+    # Somente acréscimo (append) dos incrementos: réplicas concorrentes não sobrescrevem as contagens umas das outras
+    try:
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, 'a', encoding='utf-8') as arquivo:
+            arquivo.write(json.dumps(dict(incrementos)) + '\n')
+    except OSError:
+        pass
+
+
+@st.cache_resource
+def obter_cache_rankings(limite_bytes=LIMITE_BYTES_CACHE_RANKINGS):
+    # Um único cache por processo do servidor, compartilhado por todas as sessões
+    registrar_evento_cache('obter_cache_rankings', 'faltas')
+    return {
+        'entradas': OrderedDict(),
+        'bytes_total': 0,
+        'limite_bytes': limite_bytes,
+        'versoes': None,
+        'visualizacoes': carregar_visualizacoes(),
+        'visualizacoes_pendentes': Counter(),
+        'aquecimento_iniciado': False,
+        'acertos': 0,
+        'faltas': 0,
+        'trava': threading.Lock(),
+    }
+
+
+def invalidar_cache_rankings_se_necessario(cache, versao_modelo, versao_dados):
+    # Artefatos recarregados (nova versão): descarta todos os rankings antigos
+    with cache['trava']:
+        if cache['versoes'] != (versao_modelo, versao_dados):
+            cache['entradas'].clear()
+            cache['bytes_total'] = 0
+            cache['versoes'] = (versao_modelo, versao_dados)
+            # Novo aquecimento para a nova versão; o anterior, se ainda rodando, deixa de inserir
+            cache['aquecimento_iniciado'] = False
+
+
+def registrar_visualizacao_vaga(cache, vaga_id):
+    with cache['trava']:
+        cache['visualizacoes'][str(vaga_id)] += 1
+        cache['visualizacoes_pendentes'][str(vaga_id)] += 1
+        incrementos = None
+        if sum(cache['visualizacoes_pendentes'].values()) >= 10:
+            incrementos = dict(cache['visualizacoes_pendentes'])
+            cache['visualizacoes_pendentes'].clear()
+    if incrementos is not None:
+        salvar_visualizacoes(incrementos)
+
+
+def obter_ranking_vaga(cache, vaga_id, versao_modelo, versao_dados, funcao_calculo):
+    chave = (str(vaga_id), versao_modelo, versao_dados)
+    with cache['trava']:
+        if chave in cache['entradas']:
+            cache['acertos'] += 1
+            cache['entradas'].move_to_end(chave)
+            return cache['entradas'][chave][0]
+        cache['faltas'] += 1
+
+    ranking = funcao_calculo(vaga_id)
+    tamanho = int(ranking.memory_usage(index=True, deep=True).sum())
+
+    with cache['trava']:
+        # Artefatos recarregados durante o cálculo: o ranking da versão antiga não entra no cache
+        versao_atual = cache['versoes'] == (versao_modelo, versao_dados)
+        if versao_atual and chave not in cache['entradas'] and tamanho <= cache['limite_bytes']:
+            cache['entradas'][chave] = (ranking, tamanho)
+            cache['bytes_total'] += tamanho
+            # Despejo LRU até caber no limite de memória
+            while cache['bytes_total'] > cache['limite_bytes']:
+                _, (_, tamanho_removido) = cache['entradas'].popitem(last=False)
+                cache['bytes_total'] -= tamanho_removido
+    return ranking
+
+
+def aquecer_rankings_em_segundo_plano(cache, ids_vagas, versao_modelo, versao_dados, funcao_calculo,
+                                      top_vagas=TOP_VAGAS_AQUECIMENTO):
+    # Pré-calcula, uma única vez por processo, os rankings das vagas mais visualizadas
+    with cache['trava']:
+        if cache['aquecimento_iniciado']:
+            return
+        cache['aquecimento_iniciado'] = True
+        mais_vistas = [vaga_id for vaga_id, _ in cache['visualizacoes'].most_common(top_vagas)]
+
+    ids_existentes = set(map(str, ids_vagas))
+    vagas_aquecer = [vaga_id for vaga_id in mais_vistas if vaga_id in ids_existentes]
+
+    def aquecer():
+        for vaga_id in vagas_aquecer:
+            if cache['versoes'] != (versao_modelo, versao_dados):
+                break
+            obter_ranking_vaga(cache, vaga_id, versao_modelo, versao_dados, funcao_calculo)
+
+    threading.Thread(target=aquecer, name="aquecimento-rankings", daemon=True).start()
+
+
+def calcular_ranking_vaga(vaga_id, candidatos_df):
+    # Aplica lógica de compatibilidade (exemplo parcial usado aqui)
+    candidatos_filtrados = candidatos_df.head(10)  # Essa parte pode ter análise mais calibrada
+    return candidatos_filtrados[['id_candidato', 'nome', 'nivel_profissional']]
+
+
+# ---------------------------------------------------------------------------
+# **2.3 Carregamento Concorrente de Artefatos e Métricas de Inicialização**
+# ---------------------------------------------------------------------------
+
+def inicio_do_processo():
+    # Início do contêiner informado pelo entrypoint (epoch em segundos) ou, no Linux, início do processo
+    inicio_container = os.environ.get('PAINEL_INICIO_CONTAINER')
+    if inicio_container:
+        try:
+            return float(inicio_container), 'contêiner'
+        except ValueError:
+            pass
+    try:
+        with open('/proc/self/stat', 'r') as arquivo:
+            ticks_inicio = int(arquivo.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/stat', 'r') as arquivo:
+            boot = next(int(linha.split()[1]) for linha in arquivo if linha.startswith('btime'))
+        return boot + ticks_inicio / os.sysconf('SC_CLK_TCK'), 'processo'
+    except (OSError, ValueError, IndexError, StopIteration):
+        return time.time(), 'primeira execução'
+
+
+@st.cache_resource
+def obter_metricas_inicializacao():
+    inicio, origem = inicio_do_processo()
+    return {'inicio': inicio, 'origem': origem, 'primeira_pintura': None, 'interativo': None}
+
+
+def registrar_marco_inicializacao(metricas, marco):
+    # Registrado apenas na primeira vez (inicialização a frio)
+    if metricas[marco] is None:
+        metricas[marco] = time.time() - metricas['inicio']
+        print(f"[inicialização] {marco}: {metricas[marco]:.2f} s desde o início do {metricas['origem']}")
+
+
+@st.cache_resource(max_entries=2)
+def iniciar_carregamento_artefatos(versao_modelo, versao_dados, versao_compartilhada):
+    # Dispara, uma única vez por versão, todos os carregamentos em paralelo num pool de threads
+    registrar_evento_cache('iniciar_carregamento_artefatos', 'faltas')
+    status = {}
+    futuros = {}
+
+    def executar(nome, funcao, *args):
+        status[nome] = {'inicio': time.perf_counter(), 'duracao': None}
+        try:
+            return funcao(*args)
+        finally:
+            status[nome]['duracao'] = time.perf_counter() - status[nome]['inicio']
+
+    def carregar_dataframe_sem_compartilhadas(arquivo_nome, nome_matriz):
+        matriz = futuros[nome_matriz].result() if futuros[nome_matriz].exception() is None else None
+        colunas_excluidas = tuple(matriz['colunas']) if matriz is not None else ()
+        return carregar_dataframe(DIRETORIO_DADOS, arquivo_nome, colunas_excluidas)
+
+    tarefas = {
+        'modelo': (carregar_arquivo_modelo, CAMINHO_MODELO),
+        'colunas_treinamento': (carregar_artefato, os.path.join(DIRETORIO_ARTEFATOS, 'colunas_modelo.joblib')),
+        'artefatos_engenharia': (carregar_artefato, os.path.join(DIRETORIO_ARTEFATOS, 'artefatos_engenharia.joblib')),
+        'vocabulario_tfidf': (carregar_artefato_opcional, CAMINHO_VOCABULARIO_TFIDF),
+        'vetores_tfidf': (carregar_artefato_opcional, CAMINHO_VETORES_TFIDF),
+        'matriz_vagas': (anexar_matriz_compartilhada, DIRETORIO_COMPARTILHADO, 'vagas'),
+        'matriz_candidatos': (anexar_matriz_compartilhada, DIRETORIO_COMPARTILHADO, 'candidatos'),
+        'vagas': (carregar_dataframe_sem_compartilhadas, 'vagas_processadas.csv', 'matriz_vagas'),
+        'candidatos': (carregar_dataframe_sem_compartilhadas, 'candidatos_processados.csv', 'matriz_candidatos'),
+    }
+    # Um worker por tarefa: as tarefas de CSV aguardam as matrizes sem risco de bloqueio
+    executor = ThreadPoolExecutor(max_workers=len(tarefas), thread_name_prefix="carregamento")
+    for nome, (funcao, *args) in tarefas.items():
+        futuros[nome] = executor.submit(executar, nome, funcao, *args)
+    executor.shutdown(wait=False)
+    return {'futuros': futuros, 'status': status}
+
+
+def exibir_status_carregamento(espaco, carregamento):
+    linhas = []
+    for nome, futuro in carregamento['futuros'].items():
+        duracao = carregamento['status'].get(nome, {}).get('duracao')
+        if not futuro.done():
+            linhas.append(f"⏳ `{nome}` — carregando")
+        elif futuro.exception() is not None:
+            icone = "⚠️" if nome in ARTEFATOS_OPCIONAIS else "❌"
+            linhas.append(f"{icone} `{nome}` — erro ({duracao:.2f} s)")
+        else:
+            linhas.append(f"✅ `{nome}` — {duracao:.2f} s")
+    espaco.markdown("\n\n".join(linhas))
+
+
+def aguardar_artefatos(carregamento):
+    # Atualiza o status por artefato à medida que cada carregamento termina
+    with st.sidebar.expander("Status dos artefatos", expanded=False):
+        espaco = st.empty()
+    exibir_status_carregamento(espaco, carregamento)
+    for _ in as_completed(carregamento['futuros'].values()):
+        exibir_status_carregamento(espaco, carregamento)
+
+    resultados = {}
+    houve_erro = False
+    for nome, futuro in carregamento['futuros'].items():
+        erro = futuro.exception()
+        if erro is None:
+            resultados[nome] = futuro.result()
+            continue
+        resultados[nome] = None
+        if isinstance(erro, FileNotFoundError):
+            mensagem = f"{MENSAGENS_ERRO_CARREGAMENTO[nome]}: arquivo '{erro.filename}' não encontrado."
+        else:
+            mensagem = f"{MENSAGENS_ERRO_CARREGAMENTO[nome]}: {erro}"
+        if nome in ARTEFATOS_OPCIONAIS:
+            st.sidebar.caption(f"{mensagem} Usando o CSV completo.")
+        else:
+            houve_erro = True
+            st.error(mensagem)
+
+    # Falhas de artefatos obrigatórios não ficam em cache: a próxima execução tenta carregar novamente
+    if houve_erro:
+        iniciar_carregamento_artefatos.clear()
+    return resultados
+
+
+# ---------------------------------------------------------------------------
+# **2.4 Paginação e Ordenação de Tabelas no Servidor**
+# ---------------------------------------------------------------------------
+
+@st.cache_resource
+def obter_cache_paginas(limite_entradas=LIMITE_ENTRADAS_CACHE_PAGINAS, limite_bytes=LIMITE_BYTES_CACHE_PAGINAS):
+    registrar_evento_cache('obter_cache_paginas', 'faltas')
+    return {'entradas': OrderedDict(), 'limite_entradas': limite_entradas,
+            'bytes_total': 0, 'limite_bytes': limite_bytes,
+            'acertos': 0, 'faltas': 0, 'trava': threading.Lock()}
+
+
+def _obter_ou_calcular(cache, chave, calcular):
+    with cache['trava']:
+        if chave in cache['entradas']:
+            cache['acertos'] += 1
+            cache['entradas'].move_to_end(chave)
+            return cache['entradas'][chave][0]
+        cache['faltas'] += 1
+
+    valor = calcular()
+    if hasattr(valor, 'memory_usage'):
+        tamanho = int(valor.memory_usage(index=True, deep=True).sum())
+    else:
+        tamanho = int(valor.nbytes)
+
+    with cache['trava']:
+        if chave not in cache['entradas'] and tamanho <= cache['limite_bytes']:
+            cache['entradas'][chave] = (valor, tamanho)
+            cache['bytes_total'] += tamanho
+            # Despejo LRU por memória (ordens de ordenação guardam arrays do tamanho do conjunto filtrado)
+            while (cache['bytes_total'] > cache['limite_bytes']
+                   or len(cache['entradas']) > cache['limite_entradas']):
+                _, (_, tamanho_removido) = cache['entradas'].popitem(last=False)
+                cache['bytes_total'] -= tamanho_removido
+    return valor
+
+
+def obter_pagina_tabela(cache, df, chave_tabela, posicoes, colunas, pagina, tamanho_pagina,
+                        coluna_ordenacao=None, ascendente=True):
+    import numpy as np
+
+    # Identidade do conjunto filtrado: digest das posições (rápido, sem copiar linhas)
+    assinatura = hashlib.blake2b(np.ascontiguousarray(posicoes).tobytes(), digest_size=16).hexdigest()
+
+    def ordenar():
+        # Projeção de uma única coluna: apenas ela é lida para ordenar o conjunto filtrado
+        valores = df[coluna_ordenacao].iloc[posicoes].reset_index(drop=True)
+        ordem = valores.sort_values(ascending=ascendente, kind='mergesort', na_position='last').index.to_numpy()
+        return posicoes[ordem]
+
+    if coluna_ordenacao is None:
+        posicoes_ordenadas = posicoes
+    else:
+        posicoes_ordenadas = _obter_ou_calcular(
+            cache, ('ordem', chave_tabela, assinatura, coluna_ordenacao, ascendente), ordenar
+        )
+
+    def recortar():
+        inicio = pagina * tamanho_pagina
+        indices_colunas = [df.columns.get_loc(coluna) for coluna in colunas]
+        # Janela de linhas x colunas exibidas: nada além da página sai do DataFrame de origem
+        return df.iloc[posicoes_ordenadas[inicio:inicio + tamanho_pagina], indices_colunas]
+
+    return _obter_ou_calcular(
+        cache,
+        ('pagina', chave_tabela, assinatura, tuple(colunas), coluna_ordenacao, ascendente, pagina, tamanho_pagina),
+        recortar
+    )
+
+
+def exibir_tabela_paginada(cache, df, chave_tabela, posicoes, colunas, altura=300,
+                           tamanho_pagina=TAMANHO_PAGINA_PADRAO):
+    total_linhas = len(posicoes)
+    total_paginas = max(1, -(-total_linhas // tamanho_pagina))
+
+    controles = st.columns([2, 1, 1])
+    coluna_ordenacao = controles[0].selectbox(
+        "Ordenar por:", options=['(original)'] + list(colunas), key=f"{chave_tabela}_ordenacao"
+    )
+    ascendente = controles[1].radio(
+        "Ordem:", options=['Crescente', 'Decrescente'], horizontal=True, key=f"{chave_tabela}_ordem"
+    ) == 'Crescente'
+    pagina = controles[2].number_input(
+        f"Página (de {total_paginas}):", min_value=1, max_value=total_paginas, value=1, step=1,
+        key=f"{chave_tabela}_pagina_{total_paginas}"  # reinicia na página 1 quando o total de páginas muda
+    )
+
+    pagina_df = obter_pagina_tabela(
+        cache, df, chave_tabela, posicoes, colunas, int(pagina) - 1, tamanho_pagina,
+        coluna_ordenacao=None if coluna_ordenacao == '(original)' else coluna_ordenacao,
+        ascendente=ascendente
+    )
+    st.dataframe(pagina_df, height=altura, use_container_width=True)
+    st.caption(f"{total_linhas} linhas — página {int(pagina)} de {total_paginas}")
+
+
+# ---------------------------------------------------------------------------
+# **2.5 Explicações por Candidato (contribuições nativas das árvores)**
+# ---------------------------------------------------------------------------
+
+def agrupar_feature_original(nome_feature):
+    # Prefixo mais longo primeiro: 'nivel_profissional_vaga_X' não deve cair em 'nivel_profissional'
+    for campo in sorted(CAMPOS_CATEGORICOS_MODELO, key=len, reverse=True):
+        if nome_feature.startswith(campo + '_'):
+            return campo
+    for prefixo in ('skill_', 'tech_'):
+        if nome_feature.startswith(prefixo):
+            return prefixo + '*'
+    return nome_feature
+
+
+def hash_textos(textos):
+    import pandas as pd
+
+    # Mesmo hash do pipeline (atualizar_cache_vetores): determinístico entre processos
+    return pd.util.hash_pandas_object(pd.Series(textos).fillna("").astype(str), index=False).to_numpy()
+
+
+def vetorizar_textos_tfidf(textos, modelo_tfidf):
+    import numpy as np
+    import scipy.sparse as sp
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.preprocessing import normalize
+
+    # Mesma transformação do pipeline: contagens no vocabulário ajustado x IDF, normalização L2
+    if not modelo_tfidf['vocabulario']:
+        return sp.csr_matrix((len(textos), 0))
+    vetorizador = CountVectorizer(vocabulary=modelo_tfidf['vocabulario'], token_pattern=modelo_tfidf['token_pattern'])
+    contagens = vetorizador.transform(textos).astype(np.float64)
+    return normalize(contagens @ sp.diags(modelo_tfidf['idf']), norm='l2', copy=False).tocsr()
+
+
+def vetores_entidades(cache_vetores, ids, textos, modelo_tfidf):
+    import numpy as np
+    import scipy.sparse as sp
+
+    # Reaproveita o vetor do pipeline quando (id, hash do texto) coincide; transforma apenas o restante
+    import pandas as pd
+
+    ids = [str(id_entidade) for id_entidade in ids]
+    textos = pd.Series(list(textos), dtype=object).fillna("").astype(str).tolist()
+    hashes = hash_textos(textos)
+    posicoes = [
+        cache_vetores['posicoes'].get(id_entidade)
+        if cache_vetores is not None and cache_vetores.get('hashes', {}).get(id_entidade) == int(hash_texto) else None
+        for id_entidade, hash_texto in zip(ids, hashes)
+    ]
+    acertos = [i for i, posicao in enumerate(posicoes) if posicao is not None]
+    faltas = [i for i, posicao in enumerate(posicoes) if posicao is None]
+
+    total_termos = len(modelo_tfidf['vocabulario'])
+    blocos = []
+    if acertos:
+        blocos.append(cache_vetores['matriz'][[posicoes[i] for i in acertos]])
+    if faltas:
+        blocos.append(vetorizar_textos_tfidf([textos[i] for i in faltas], modelo_tfidf))
+    if not blocos:
+        return sp.csr_matrix((0, total_termos))
+    ordem = np.argsort(np.array(acertos + faltas))
+    return sp.vstack(blocos, format='csr')[ordem]
+
+
+def calcular_similaridade_texto(tfidf, vaga_id, texto_vaga, ids_candidatos, textos_candidatos):
+    import numpy as np
+
+    vetor_vaga = vetores_entidades(tfidf['vetores'].get('vagas') if tfidf['vetores'] else None,
+                                   [vaga_id], [texto_vaga], tfidf['modelo'])
+    vetores_cand = vetores_entidades(tfidf['vetores'].get('candidatos') if tfidf['vetores'] else None,
+                                     ids_candidatos, textos_candidatos, tfidf['modelo'])
+    # Vetores normalizados: produto escalar = cosseno
+    return np.asarray((vetores_cand @ vetor_vaga.T).todense()).ravel()
+
+
+def construir_features_pares(vagas_df, candidatos_df, matrizes, vaga_id, ids_candidatos, colunas_treinamento,
+                             tfidf=None):
+    import numpy as np
+    import pandas as pd
+
+    ids_candidatos = [str(id_candidato) for id_candidato in ids_candidatos]
+    vaga = vagas_df.loc[vagas_df['id_vaga'] == str(vaga_id)].head(1)
+    candidatos = candidatos_df.drop_duplicates('id_candidato').set_index('id_candidato').reindex(ids_candidatos)
+
+    # Colunas numéricas publicadas em memória compartilhada: somente as linhas necessárias são lidas
+    def numericas(nome, ids):
+        matriz = matrizes.get(nome)
+        if matriz is None:
+            return pd.DataFrame(index=range(len(ids)))
+        posicoes = matriz['posicoes'].reindex(ids)
+        valores = np.full((len(ids), len(matriz['colunas'])), np.nan, dtype=np.float32)
+        validas = posicoes.notna().to_numpy()
+        valores[validas] = matriz['matriz'][posicoes[validas].astype(int).to_numpy()]
+        return pd.DataFrame(valores, columns=matriz['colunas'])
+
+    numericas_cand = numericas('candidatos', ids_candidatos)
+    numericas_vaga = numericas('vagas', [str(vaga_id)])
+
+    nao_resolvidas = []
+
+    def numericos(valores, coluna):
+        # Valores não nulos que não são números não viram NaN em silêncio: a coluna fica sem origem válida
+        convertidos = pd.to_numeric(valores, errors='coerce')
+        if (convertidos.isna() & valores.notna()).any() and coluna not in nao_resolvidas:
+            nao_resolvidas.append(coluna)
+        return convertidos.to_numpy(dtype=float)
+
+    def valores_candidato(coluna):
+        if coluna in numericas_cand.columns:
+            return numericas_cand[coluna].to_numpy(dtype=float)
+        if coluna in candidatos.columns:
+            return numericos(candidatos[coluna], coluna)
+        return None
+
+    def valor_vaga(coluna):
+        if coluna in numericas_vaga.columns:
+            return float(numericas_vaga[coluna].iloc[0])
+        if coluna in vaga.columns and not vaga.empty:
+            return float(numericos(vaga[coluna], coluna)[0])
+        return None
+
+    def primeiro_disponivel(funcao, nomes):
+        for nome in nomes:
+            valor = funcao(nome)
+            if valor is not None:
+                return valor
+        return None
+
+    # Features de par vaga x candidato: mesma lógica de recalcular_features_eda no pipeline
+    pares = {}
+    for idioma in ('ingles', 'espanhol'):
+        nivel_cand = primeiro_disponivel(valores_candidato, [f'nivel_{idioma}_ordinal_candidato', f'nivel_{idioma}_ordinal'])
+        nivel_vaga = primeiro_disponivel(valor_vaga, [f'nivel_{idioma}_ordinal_vaga', f'nivel_{idioma}_ordinal_vaga_merged',
+                                                      f'nivel_{idioma}_ordinal'])
+        if nivel_cand is not None and nivel_vaga is not None:
+            pares[f'compat_{idioma}'] = (
+                np.nan_to_num(nivel_cand).astype(int) >= int(np.nan_to_num(nivel_vaga))
+            ).astype(float)
+
+    colunas_vaga = list(numericas_vaga.columns) + list(vaga.columns)
+    tech_cols_vaga = sorted({coluna for coluna in colunas_vaga if coluna.startswith('tech_') and '_candidato' not in coluna})
+    if tech_cols_vaga and not vaga.empty:
+        total_techs = sum(np.nan_to_num(valor_vaga(coluna)) for coluna in tech_cols_vaga)
+        skills_match = np.zeros(len(ids_candidatos))
+        for tech_col in tech_cols_vaga:
+            skills_cand = valores_candidato(tech_col.replace('tech_', 'skill_'))
+            if skills_cand is not None:
+                skills_match += np.nan_to_num(valor_vaga(tech_col)) * np.nan_to_num(skills_cand)
+        pares['total_techs_vaga'] = np.full(len(ids_candidatos), float(total_techs))
+        pares['skills_match_count'] = skills_match
+        pares['skills_faltantes_vaga'] = np.clip(total_techs - skills_match, 0, None)
+
+    if (tfidf is not None and tfidf['modelo'] is not None and not vaga.empty
+            and 'descricao_unificada' in vaga.columns and 'descricao_completa' in candidatos.columns):
+        pares['similaridade_texto'] = calcular_similaridade_texto(
+            tfidf, vaga_id, vaga['descricao_unificada'].iloc[0], ids_candidatos, candidatos['descricao_completa']
+        )
+
+    X = pd.DataFrame(0.0, index=range(len(ids_candidatos)), columns=colunas_treinamento)
+    for coluna in colunas_treinamento:
+        if coluna in pares:
+            X[coluna] = pares[coluna]
+            continue
+        valores = valores_candidato(coluna)
+        if valores is None:
+            valores = valor_vaga(coluna)
+        if valores is not None:
+            X[coluna] = valores
+            continue
+        campo = agrupar_feature_original(coluna)
+        valor = coluna[len(campo) + 1:]
+        if campo in CAMPOS_CATEGORICOS_MODELO and campo in candidatos.columns:
+            X[coluna] = (candidatos[campo].astype(str) == valor).astype(float).to_numpy()
+        elif campo in CAMPOS_CATEGORICOS_MODELO and campo in vaga.columns and not vaga.empty:
+            X[coluna] = float(str(vaga[campo].iloc[0]) == valor)
+        elif coluna not in nao_resolvidas:
+            nao_resolvidas.append(coluna)
+
+    # Nunca explicar com entradas inventadas: colunas sem origem no painel interrompem o lote
+    if nao_resolvidas:
+        raise ValueError(
+            f"{len(nao_resolvidas)} feature(s) do modelo sem origem nos dados do painel: "
+            f"{', '.join(nao_resolvidas[:10])}{' ...' if len(nao_resolvidas) > 10 else ''}"
+        )
+    return X
+
+
+def motivo_sem_contribuicoes(modelo):
+    # None se o modelo oferece contribuições nativas; caso contrário, a mensagem exibida ao usuário
+    if hasattr(modelo, 'booster_') or type(modelo).__module__.startswith('lightgbm'):
+        return None
+    return f"o modelo '{type(modelo).__name__}' não oferece contribuições nativas (pred_contrib)"
+
+
+def calcular_contribuicoes(modelo, X):
+    import numpy as np
+    import pandas as pd
+
+    # LightGBM: contribuições TreeSHAP nativas (pred_contrib), calculadas em lote
+    motivo = motivo_sem_contribuicoes(modelo)
+    if motivo is not None:
+        raise TypeError(motivo)
+    if hasattr(modelo, 'booster_'):
+        contribuicoes = modelo.booster_.predict(X, pred_contrib=True)
+    else:
+        contribuicoes = modelo.predict(X, pred_contrib=True)
+
+    # Última coluna é o valor esperado; em multiclasse, usa o bloco da última classe
+    contribuicoes = np.asarray(contribuicoes)[:, -(X.shape[1] + 1):]
+    contribuicoes_df = pd.DataFrame(contribuicoes[:, :-1], columns=X.columns)
+    return contribuicoes_df.T.groupby(agrupar_feature_original).sum().T
+
+
+@st.cache_resource
+def obter_servico_explicacoes(limite_entradas=LIMITE_ENTRADAS_CACHE_EXPLICACOES):
+    # Um worker dedicado: explicações nunca disputam a thread da execução do script
+    registrar_evento_cache('obter_servico_explicacoes', 'faltas')
+    return {
+        'entradas': OrderedDict(),
+        'limite_entradas': limite_entradas,
+        'pendentes': {},
+        'erros': OrderedDict(),
+        'executor': ThreadPoolExecutor(max_workers=1, thread_name_prefix="explicacoes"),
+        'acertos': 0,
+        'faltas': 0,
+        'trava': threading.Lock(),
+    }
+
+
+def _calcular_lote_explicacoes(servico, chave_lote, vaga_id, ids_faltantes, versao_modelo, funcao_lote):
+    try:
+        contribuicoes = funcao_lote(vaga_id, ids_faltantes)
+        with servico['trava']:
+            for id_candidato, (_, linha) in zip(ids_faltantes, contribuicoes.iterrows()):
+                servico['entradas'][(str(vaga_id), str(id_candidato), versao_modelo)] = linha
+            while len(servico['entradas']) > servico['limite_entradas']:
+                servico['entradas'].popitem(last=False)
+    except Exception as e:
+        # Falha registrada por chave: não é recalculada a cada rerun (só com nova versão do modelo)
+        with servico['trava']:
+            for id_candidato in ids_faltantes:
+                servico['erros'][(str(vaga_id), str(id_candidato), versao_modelo)] = str(e)
+            while len(servico['erros']) > servico['limite_entradas']:
+                servico['erros'].popitem(last=False)
+    finally:
+        with servico['trava']:
+            servico['pendentes'].pop(chave_lote, None)
+
+
+def solicitar_explicacoes(servico, vaga_id, ids_candidatos, versao_modelo, funcao_lote, contabilizar=True):
+    # Retorna as explicações já em cache, os erros registrados e dispara (sem bloquear) um lote com as faltantes
+    prontas = {}
+    erros = {}
+    faltantes = []
+    with servico['trava']:
+        for id_candidato in ids_candidatos:
+            chave = (str(vaga_id), str(id_candidato), versao_modelo)
+            if chave in servico['entradas']:
+                if contabilizar:
+                    servico['acertos'] += 1
+                servico['entradas'].move_to_end(chave)
+                prontas[id_candidato] = servico['entradas'][chave]
+            elif chave in servico['erros']:
+                erros[id_candidato] = servico['erros'][chave]
+            else:
+                faltantes.append(id_candidato)
+
+        futuro = None
+        if faltantes:
+            chave_lote = (str(vaga_id), versao_modelo, tuple(map(str, faltantes)))
+            futuro = servico['pendentes'].get(chave_lote)
+            if futuro is None:
+                servico['faltas'] += len(faltantes)
+                futuro = servico['executor'].submit(
+                    _calcular_lote_explicacoes, servico, chave_lote, vaga_id, faltantes, versao_modelo, funcao_lote
+                )
+                servico['pendentes'][chave_lote] = futuro
+    return prontas, erros, futuro
+
+
+def _exibir_resultado_explicacoes(vaga_id, ids_candidatos, prontas, erros):
+    if erros:
+        mensagens = sorted(set(erros.values()))
+        st.warning(f"Não foi possível calcular as explicações de {len(erros)} candidato(s): {'; '.join(mensagens)}")
+    if len(prontas) + len(erros) < len(ids_candidatos):
+        st.info(f"Explicações em cálculo em segundo plano ({len(prontas)}/{len(ids_candidatos)} prontas).")
+
+    if prontas:
+        candidato = st.selectbox("Candidato:", options=list(prontas), key=f"explicacao_candidato_{vaga_id}")
+        contribuicoes = prontas[candidato]
+        principais = contribuicoes.reindex(contribuicoes.abs().sort_values(ascending=False).index).head(10)
+        st.bar_chart(principais)
+
+
+def exibir_explicacoes(servico, vaga_id, ids_candidatos, versao_modelo, funcao_lote, modelo,
+                       top_k=TOP_K_EXPLICACOES):
+    st.markdown("#### Por que estes candidatos?")
+    motivo = motivo_sem_contribuicoes(modelo)
+    if motivo is not None:
+        st.warning(f"Explicações indisponíveis: {motivo}.")
+        return
+
+    ids_candidatos = list(ids_candidatos)[:top_k]
+    prontas, erros, futuro = solicitar_explicacoes(servico, vaga_id, ids_candidatos, versao_modelo, funcao_lote)
+    if futuro is None:
+        _exibir_resultado_explicacoes(vaga_id, ids_candidatos, prontas, erros)
+        return
+
+    # Lote em segundo plano: somente este trecho é reexecutado periodicamente até o lote terminar
+    @st.fragment(run_every=INTERVALO_ATUALIZACAO_EXPLICACOES_S)
+    def acompanhar_lote_explicacoes():
+        prontas, erros, futuro = solicitar_explicacoes(servico, vaga_id, ids_candidatos, versao_modelo,
+                                                       funcao_lote, contabilizar=False)
+        if futuro is None:
+            # Lote concluído: uma reexecução completa exibe o resultado e encerra a atualização periódica
+            st.rerun()
+        _exibir_resultado_explicacoes(vaga_id, ids_candidatos, prontas, erros)
+
+    acompanhar_lote_explicacoes()
+
+
+# ---------------------------------------------------------------------------
+# **2.6 Diagnóstico: Tempos por Fase, Caches e Memória**
+# ---------------------------------------------------------------------------
+
+@st.cache_resource
+def obter_estatisticas_caches():
+    # Contadores por função em cache (st.cache_resource): faltas contadas no corpo, chamadas no ponto de uso
+    return {'contadores': {}, 'trava': threading.Lock()}
+
+
+def registrar_evento_cache(nome, evento):
+    estatisticas = obter_estatisticas_caches()
+    with estatisticas['trava']:
+        contadores = estatisticas['contadores'].setdefault(nome, {'chamadas': 0, 'faltas': 0})
+        contadores[evento] += 1
+
+
+def chamar_em_cache(nome, funcao, *args):
+    registrar_evento_cache(nome, 'chamadas')
+    return funcao(*args)
+
+
+@contextmanager
+def medir_fase(tempos, fase):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        tempos[fase] = tempos.get(fase, 0.0) + time.perf_counter() - inicio
+
+
+def memoria_do_processo():
+    # RSS atual em bytes (Linux); fora do Linux, pico de RSS via resource
+    try:
+        with open('/proc/self/status', 'r') as arquivo:
+            for linha in arquivo:
+                if linha.startswith('VmRSS:'):
+                    return int(linha.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico if sys.platform == 'darwin' else pico * 1024
+    except ImportError:
+        return None
+
+
+def tamanho_em_bytes(objeto):
+    # None quando o tamanho não pode ser medido de forma confiável (ex.: modelo com memória nativa)
+    if objeto is None:
+        return 0
+    if hasattr(objeto, 'memory_usage'):
+        return int(objeto.memory_usage(index=True).sum())
+    if hasattr(objeto, 'nbytes'):
+        return int(objeto.nbytes)
+    if isinstance(objeto, dict):
+        tamanhos = [tamanho_em_bytes(valor) for valor in objeto.values()]
+        return None if None in tamanhos else sum(tamanhos)
+    if isinstance(objeto, (list, tuple)):
+        return sys.getsizeof(objeto) + sum(sys.getsizeof(item) for item in objeto)
+    if isinstance(objeto, (str, bytes, int, float)):
+        return sys.getsizeof(objeto)
+    return None
+
+
+def em_megabytes(tamanho):
+    return round(tamanho / 2 ** 20, 2) if tamanho is not None else None
+
+
+def registrar_log_diagnostico(registro, caminho=CAMINHO_LOG_DIAGNOSTICO, limite_bytes=LIMITE_BYTES_LOG_DIAGNOSTICO):
+    # JSON-lines com rotação simples: ao passar do limite, o arquivo atual vira '.1'
+    try:
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        if os.path.exists(caminho) and os.path.getsize(caminho) > limite_bytes:
+            os.replace(caminho, caminho + '.1')
+        with open(caminho, 'a', encoding='utf-8') as arquivo:
+            arquivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+    except OSError as e:
+        print(f"[diagnóstico] não foi possível gravar '{caminho}': {e}")
+
+
+def exibir_diagnostico(tempos, artefatos, indice_filtros, cache_rankings, cache_paginas, servico_explicacoes):
+    memoria = memoria_do_processo()
+    estatisticas = obter_estatisticas_caches()
+    with estatisticas['trava']:
+        contadores = {nome: dict(valores) for nome, valores in estatisticas['contadores'].items()}
+    with indice_filtros['trava']:
+        bytes_filtros = sum(posicoes.nbytes for posicoes in indice_filtros['cache'].values())
+        caches = {
+            'filtros_vagas': {'acertos': indice_filtros['acertos'], 'faltas': indice_filtros['faltas'],
+                              'entradas': len(indice_filtros['cache']), 'bytes': bytes_filtros},
+        }
+    with cache_rankings['trava']:
+        caches['rankings'] = {'acertos': cache_rankings['acertos'], 'faltas': cache_rankings['faltas'],
+                              'entradas': len(cache_rankings['entradas']), 'bytes': cache_rankings['bytes_total']}
+    with cache_paginas['trava']:
+        caches['paginas_tabelas'] = {
+            'acertos': cache_paginas['acertos'], 'faltas': cache_paginas['faltas'],
+            'entradas': len(cache_paginas['entradas']),
+            'bytes': cache_paginas['bytes_total'],
+        }
+    with servico_explicacoes['trava']:
+        caches['explicacoes'] = {
+            'acertos': servico_explicacoes['acertos'], 'faltas': servico_explicacoes['faltas'],
+            'entradas': len(servico_explicacoes['entradas']),
+            'erros': len(servico_explicacoes['erros']),
+            'bytes': sum(tamanho_em_bytes(valor) or 0 for valor in servico_explicacoes['entradas'].values()),
+        }
+    for nome, valores in contadores.items():
+        caches[nome] = {'acertos': valores['chamadas'] - valores['faltas'], 'faltas': valores['faltas']}
+
+    registrar_log_diagnostico({
+        'timestamp': time.time(),
+        'tempos_s': tempos,
+        'caches': caches,
+        'memoria_bytes': memoria,
+    })
+
+    with st.sidebar.expander("Diagnóstico", expanded=True):
+        st.markdown("**Tempos desta execução**")
+        st.table({'fase': list(tempos), 'ms': [round(valor * 1000, 1) for valor in tempos.values()]})
+        st.markdown("**Caches**")
+        st.table({
+            'cache': list(caches),
+            'acertos': [valores['acertos'] for valores in caches.values()],
+            'faltas': [valores['faltas'] for valores in caches.values()],
+            'entradas': [valores.get('entradas') for valores in caches.values()],
+            'MB': [em_megabytes(valores.get('bytes')) for valores in caches.values()],
+        })
+        st.markdown("**Artefatos carregados (MB; vazio = desconhecido)**")
+        st.table({
+            'artefato': list(artefatos),
+            'MB': [em_megabytes(tamanho_em_bytes(objeto)) for objeto in artefatos.values()],
+        })
+        if memoria is not None:
+            st.metric("Memória do processo (RSS)", f"{memoria / 2 ** 20:.1f} MB")
+        st.caption(f"Tempos exportados para '{CAMINHO_LOG_DIAGNOSTICO}'.")
 
 
 # ---------------------------------------------------------------------------
 # **3. Função Principal**
 # ---------------------------------------------------------------------------
 def iniciar_painel():
-    # Configuração inicial e carregamentos
+    # Configuração inicial: o esqueleto da página é exibido antes de qualquer carregamento pesado
+    metricas_inicializacao = obter_metricas_inicializacao()
     st.title("Sistema de Recrutamento Inteligente")
+    registrar_marco_inicializacao(metricas_inicializacao, 'primeira_pintura')
+    diagnostico_ativo = st.sidebar.checkbox("Mostrar diagnóstico", value=DIAGNOSTICO_PADRAO)
+    tempos = {}
 
-    # Carregar modelos e dados
-    modelo_carregado = carregar_arquivo_modelo(os.path.join(DIRETORIO_ARTEFATOS, 'modelo_recrutamento_rf.joblib'))
-    colunas_treinamento = carregar_artefato(os.path.join(DIRETORIO_ARTEFATOS, 'colunas_modelo.joblib'))
-    artefatos_engenharia = carregar_artefato(os.path.join(DIRETORIO_ARTEFATOS, 'artefatos_engenharia.joblib'))
-    vagas_df = carregar_dataframe(DIRETORIO_DADOS, 'vagas_processadas.csv')
-    candidatos_df = carregar_dataframe(DIRETORIO_DADOS, 'candidatos_processados.csv')
+    # Versões de modelo e dados: chaves dos caches e gatilho de recarga/invalidação
+    versao_modelo = versao_arquivos([CAMINHO_MODELO, CAMINHO_VOCABULARIO_TFIDF, CAMINHO_VETORES_TFIDF])
+    versao_dados = versao_arquivos(CAMINHOS_DADOS)
+    versao_compartilhada = versao_arquivos([os.path.join(DIRETORIO_COMPARTILHADO, f"{nome}_meta.json")
+                                            for nome in ('vagas', 'candidatos')])
+
+    # Carregar modelos e dados (em paralelo; matrizes compartilhadas entre réplicas quando publicadas)
+    with medir_fase(tempos, 'carregamento'):
+        carregamento = chamar_em_cache('iniciar_carregamento_artefatos', iniciar_carregamento_artefatos,
+                                       versao_modelo, versao_dados, versao_compartilhada)
+        artefatos = aguardar_artefatos(carregamento)
+
+    import pandas as pd
+
+    modelo_carregado = artefatos['modelo']
+    colunas_treinamento = artefatos['colunas_treinamento']
+    artefatos_engenharia = artefatos['artefatos_engenharia']
+    vagas_df = artefatos['vagas'] if artefatos['vagas'] is not None else pd.DataFrame()
+    candidatos_df = artefatos['candidatos'] if artefatos['candidatos'] is not None else pd.DataFrame()
 
     # Verificação de elementos obrigatórios
     if not all([modelo_carregado, colunas_treinamento, artefatos_engenharia, not vagas_df.empty, not candidatos_df.empty]):
         st.error("Não foi possível carregar todos os elementos essenciais para o sistema.")
         st.stop()
 
-    # Configurações do painel
-    categorias = vagas_df['categoria_vaga'].unique() if 'categoria_vaga' in vagas_df.columns else []
-    modalidades = vagas_df['modalidade_trabalho'].unique() if 'modalidade_trabalho' in vagas_df.columns else []
-    niveis_prof = vagas_df['nivel_profissional_vaga'].unique() if 'nivel_profissional_vaga' in vagas_df.columns else []
+    # Configurações do painel (opções pré-calculadas no índice)
+    with medir_fase(tempos, 'construcao_indices'):
+        indice_filtros = chamar_em_cache('construir_indice_filtros', construir_indice_filtros, versao_dados, vagas_df)
+    categorias = indice_filtros['opcoes'].get('categoria_vaga', [])
+    modalidades = indice_filtros['opcoes'].get('modalidade_trabalho', [])
+    niveis_prof = indice_filtros['opcoes'].get('nivel_profissional_vaga', [])
 
     # Apresentação e Filtros
     st.header("Banco de Vagas Disponíveis")
-    filtro_categorias = st.sidebar.multiselect("Categorias de Vagas:", categories=categorias)
+    filtro_categorias = st.sidebar.multiselect("Categorias de Vagas:", options=categorias)
     filtro_modalidades = st.sidebar.multiselect("Tipos de Trabalho:", options=modalidades)
     filtro_niveis = st.sidebar.multiselect("Níveis Profissionais:", options=niveis_prof)
 
-    # Aplicação de Filtros
-    vagas_filtradas = vagas_df.copy()
-    if filtro_categorias:
-        vagas_filtradas = vagas_filtradas[vagas_filtradas['categoria_vaga'].isin(filtro_categorias)]
-    if filtro_modalidades:
-        vagas_filtradas = vagas_filtradas[vagas_filtradas['modalidade_trabalho'].isin(filtro_modalidades)]
-    if filtro_niveis:
-        vagas_filtradas = vagas_filtradas[vagas_filtradas['nivel_profissional_vaga'].isin(filtro_niveis)]
+    # Aplicação de Filtros (AND de bitmaps, resultado em cache por combinação de filtros)
+    with medir_fase(tempos, 'filtragem'):
+        posicoes_filtradas = filtrar_posicoes_vagas(indice_filtros, {
+            'categoria_vaga': filtro_categorias,
+            'modalidade_trabalho': filtro_modalidades,
+            'nivel_profissional_vaga': filtro_niveis,
+        })
 
     # Exibe Vagas Disponíveis
-    st.dataframe(vagas_filtradas[['id_vaga', 'titulo_vaga', 'cliente', 'modalidade_trabalho', 'categoria_vaga']],
-                 height=300, use_container_width=True)
+    cache_paginas = chamar_em_cache('obter_cache_paginas', obter_cache_paginas)
+    colunas_exibicao = ['id_vaga', 'titulo_vaga', 'cliente', 'modalidade_trabalho', 'categoria_vaga']
+    with medir_fase(tempos, 'renderizacao_tabelas'):
+        exibir_tabela_paginada(cache_paginas, vagas_df, f"vagas_{versao_dados}", posicoes_filtradas, colunas_exibicao)
 
     # Seleção de Vagas
-    opcoes_vagas = vagas_filtradas['id_vaga'].unique()
+    opcoes_vagas = pd.unique(indice_filtros['ids_vaga'][posicoes_filtradas])
     vaga_selecionada = st.selectbox("Selecione uma Vaga:", options=opcoes_vagas)
 
+    # Cache de rankings (compartilhado entre sessões) e aquecimento opcional
+    cache_rankings = chamar_em_cache('obter_cache_rankings', obter_cache_rankings)
+    invalidar_cache_rankings_se_necessario(cache_rankings, versao_modelo, versao_dados)
+
+    def funcao_ranking(vaga_id):
+        return calcular_ranking_vaga(vaga_id, candidatos_df)
+
+    if AQUECER_RANKINGS:
+        aquecer_rankings_em_segundo_plano(
+            cache_rankings, indice_filtros['ids_vaga'], versao_modelo, versao_dados, funcao_ranking
+        )
+
+    # Explicações em lote para os candidatos do ranking (calculadas fora da thread do script)
+    servico_explicacoes = chamar_em_cache('obter_servico_explicacoes', obter_servico_explicacoes)
+    matrizes_compartilhadas = {'vagas': artefatos['matriz_vagas'], 'candidatos': artefatos['matriz_candidatos']}
+    tfidf = {'modelo': artefatos['vocabulario_tfidf'], 'vetores': artefatos['vetores_tfidf']}
+
+    def funcao_explicacoes(vaga_id, ids_candidatos):
+        import numpy as np
+
+        ids_candidatos = [str(id_candidato) for id_candidato in ids_candidatos]
+        X = construir_features_pares(vagas_df, candidatos_df, matrizes_compartilhadas,
+                                     vaga_id, ids_candidatos, colunas_treinamento, tfidf=tfidf)
+        # Re-cadastros com entradas idênticas ao modelo são explicados uma única vez (linhas iguais de X);
+        # o id_cluster_perfil não basta: membros do mesmo cluster podem diferir em campos usados pelo modelo
+        codigos, _ = pd.factorize(pd.util.hash_pandas_object(X, index=False))
+        _, indices_unicos = np.unique(codigos, return_index=True)
+        contribuicoes = calcular_contribuicoes(modelo_carregado, X.iloc[indices_unicos].reset_index(drop=True))
+        return contribuicoes.iloc[codigos].reset_index(drop=True)
+
     # Calcular Match para Candidatos
     if vaga_selecionada:
 
         st.subheader(f"Resultados para a Vaga ID {vaga_selecionada}")
-        # Aplica lógica de compatibilidade (exemplo parcial usado aqui)
-        candidatos_filtrados = candidatos_df.head(10)  # Essa parte pode ter análise mais calibrada
-        st.dataframe(candidatos_filtrados[['id_candidato', 'nome', 'nivel_profissional']], height=300)
+        # Conta uma visualização apenas quando a seleção muda (não a cada rerun provocado por outros widgets)
+        if st.session_state.get('ultima_vaga_visualizada') != vaga_selecionada:
+            st.session_state['ultima_vaga_visualizada'] = vaga_selecionada
+            registrar_visualizacao_vaga(cache_rankings, vaga_selecionada)
+        with medir_fase(tempos, 'ranking'):
+            candidatos_filtrados = obter_ranking_vaga(
+                cache_rankings, vaga_selecionada, versao_modelo, versao_dados, funcao_ranking
+            )
+        with medir_fase(tempos, 'renderizacao_tabelas'):
+            import numpy as np
+
+            exibir_tabela_paginada(
+                cache_paginas, candidatos_filtrados,
+                f"candidatos_{vaga_selecionada}_{versao_modelo}_{versao_dados}",
+                np.arange(len(candidatos_filtrados)), list(candidatos_filtrados.columns)
+            )
+        exibir_explicacoes(servico_explicacoes, vaga_selecionada, candidatos_filtrados['id_candidato'],
+                           versao_modelo, funcao_explicacoes, modelo_carregado)
 
     st.sidebar.markdown("---")
 
+    registrar_marco_inicializacao(metricas_inicializacao, 'interativo')
+    st.sidebar.caption(
+        f"Inicialização a frio: primeira pintura em {metricas_inicializacao['primeira_pintura']:.2f} s, "
+        f"interativo em {metricas_inicializacao['interativo']:.2f} s (desde o início do {metricas_inicializacao['origem']})"
+    )
+
+    if diagnostico_ativo:
+        exibir_diagnostico(tempos, artefatos, indice_filtros, cache_rankings, cache_paginas, servico_explicacoes)
+
 
 # ---------------------------------------------------------------------------
 # **4. Inicializador**
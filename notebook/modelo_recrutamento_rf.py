@@ -1,5 +1,8 @@
 # Importação de bibliotecas essenciais
 import json
+import re
+import zlib
+import numpy as np
 import pandas as pd
 import os
 import gdown 
@@ -93,6 +96,41 @@ def pre_limpar_campos_textuais(df, colunas_textuais, valor_faltante="Indefinido"
             df[coluna] = valor_faltante
     return df
 
+# Estatísticas de reaproveitamento da deduplicação de textos (por etapa)
+estatisticas_dedup_textos = {}
+
+# Função para concatenar colunas textuais de forma vetorizada (sem apply linha a linha)
+def concatenar_colunas_texto(df, colunas, valores_ignorados=()):
+    partes = []
+    for coluna in colunas:
+        serie = df[coluna].fillna("").astype(str).str.strip()
+        if valores_ignorados:
+            serie = serie.mask(serie.str.lower().isin(valores_ignorados), "")
+        partes.append(serie)
+    texto = partes[0].str.cat(partes[1:], sep=" ")
+    # Normalização: espaços colapsados e caixa baixa, para que textos-modelo repetidos coincidam
+    return texto.str.replace(r"\s+", " ", regex=True).str.strip().str.lower()
+
+# Função para aplicar uma transformação uma única vez por texto distinto e replicar o resultado às linhas
+def aplicar_por_texto_unico(serie, funcao, etapa):
+    # pd.factorize faz o hash dos textos: cada texto distinto é processado apenas uma vez
+    codigos, textos_unicos = pd.factorize(serie.fillna(""))
+    resultado = funcao(pd.Series(textos_unicos))
+    resultado = resultado.take(codigos)
+    resultado.index = serie.index
+
+    total_linhas = len(serie)
+    total_unicos = len(textos_unicos)
+    taxa = 1 - total_unicos / total_linhas if total_linhas else 0.0
+    estatisticas_dedup_textos[etapa] = {
+        "linhas": total_linhas,
+        "textos_unicos": total_unicos,
+        "taxa_reaproveitamento": taxa
+    }
+    print(f"Deduplicação '{etapa}': {total_linhas} linhas, {total_unicos} textos únicos "
+          f"(taxa de reaproveitamento: {taxa:.1%})")
+    return resultado
+
 # Função para extração da modalidade de trabalho (Híbrido, Remoto, Presencial)
 def classificar_modalidade(texto):
     texto = str(texto).lower()
@@ -114,10 +152,17 @@ def limpar_area(area):
 
 # Função para extração de tecnologias
 def marcar_tecnologias(df, tecnologias, campo_texto, sufixo="tecnologia_"):
-    for tecnologia in tecnologias:
-        nome_coluna = sufixo + tecnologia.replace(" ", "_").replace(".", "").replace("+", "plus").lower()
-        padrao = rf"\b{re.escape(tecnologia)}\b"
-        df[nome_coluna] = df[campo_texto].apply(lambda x: 1 if re.search(padrao, str(x), re.IGNORECASE) else 0)
+    def marcar(textos):
+        marcacoes = pd.DataFrame(index=textos.index)
+        for tecnologia in tecnologias:
+            nome_coluna = sufixo + tecnologia.replace(" ", "_").replace(".", "").replace("+", "plus").lower()
+            padrao = rf"\b{re.escape(tecnologia)}\b"
+            marcacoes[nome_coluna] = textos.str.contains(padrao, case=False, regex=True).astype(int)
+        return marcacoes
+
+    marcacoes = aplicar_por_texto_unico(df[campo_texto].astype(str), marcar, f"tecnologias:{campo_texto}")
+    for nome_coluna in marcacoes.columns:
+        df[nome_coluna] = marcacoes[nome_coluna].to_numpy()
     return df
 
 # Função para categorizar vagas com base no título
@@ -162,14 +207,16 @@ if not vagas_processado.empty:
 
     # 6. Criação de texto combinado para NLP
     colunas_texto_combinado = ["titulo", "atividades", "competencias"]
-    vagas_processado["descricao_unificada"] = vagas_processado[colunas_texto_combinado].apply(lambda x: " ".join(x), axis=1).str.lower()
+    vagas_processado["descricao_unificada"] = concatenar_colunas_texto(vagas_processado, colunas_texto_combinado)
 
     # 7. Extração de tecnologias
     tecnologias_chave = ['python', 'java', 'aws', 'azure', 'devops', 'abap', 'sap']
     vagas_processado = marcar_tecnologias(vagas_processado, tecnologias_chave, "descricao_unificada")
 
     # 8. Generalização de títulos para categorias
-    vagas_processado["categoria"] = vagas_processado["titulo"].apply(categorizar_titulo)
+    vagas_processado["categoria"] = aplicar_por_texto_unico(
+        vagas_processado["titulo"], lambda titulos: titulos.map(categorizar_titulo), "categoria_vaga"
+    )
 
     # 9. Renomear colunas que requerem ajustes
     vagas_processado.rename(columns={"nivel_profissional": "nivel_profissional_cargo"}, inplace=True)
@@ -226,6 +273,101 @@ def preparar_dados_candidatos(dados_json):
     
     return pd.DataFrame(registros)
 
+# Estatísticas da deduplicação de perfis de candidatos (última execução)
+estatisticas_dedup_perfis = {}
+
+# Função para normalizar campos de perfil (caixa, acentos, pontuação e espaços)
+def normalizar_texto_perfil(df, colunas):
+    partes = [df[coluna].fillna("").astype(str) if coluna in df.columns else pd.Series("", index=df.index)
+              for coluna in colunas]
+    texto = partes[0].str.cat(partes[1:], sep=" ").str.lower()
+    texto = texto.str.normalize("NFKD").str.encode("ascii", errors="ignore").str.decode("ascii")
+    return texto.str.replace(r"[^a-z0-9]+", " ", regex=True).str.strip()
+
+# Função para calcular assinaturas MinHash (shingles de palavras) de uma lista de textos
+def calcular_assinaturas_minhash(textos, num_permutacoes=64, tamanho_shingle=3, semente=42):
+    primo = np.uint64((1 << 61) - 1)
+    gerador = np.random.default_rng(semente)
+    coef_a = gerador.integers(1, 1 << 31, size=num_permutacoes, dtype=np.uint64)
+    coef_b = gerador.integers(0, 1 << 31, size=num_permutacoes, dtype=np.uint64)
+
+    assinaturas = np.full((len(textos), num_permutacoes), np.iinfo(np.uint64).max, dtype=np.uint64)
+    for linha, texto in enumerate(textos):
+        palavras = texto.split()
+        shingles = {" ".join(palavras[i:i + tamanho_shingle]) for i in range(max(1, len(palavras) - tamanho_shingle + 1))}
+        hashes = np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64)
+        # Hashes de 32 bits x coeficientes < 2^31: o produto cabe em 64 bits sem overflow
+        assinaturas[linha] = ((coef_a[:, None] * hashes[None, :] + coef_b[:, None]) % primo).min(axis=1)
+    return assinaturas
+
+# Função para agrupar perfis duplicados (exatos e aproximados) de candidatos em clusters
+def agrupar_perfis_duplicados(df, colunas_perfil, colunas_exatas=(), limiar=0.85, num_permutacoes=64, bandas=16,
+                              col_id="identificador_candidato", col_cluster="id_cluster_perfil"):
+    if df.empty:
+        df[col_cluster] = pd.Series(dtype=str)
+        return df
+
+    # 1. Duplicatas exatas: hash do perfil normalizado (campos exatos + texto)
+    texto_perfil = normalizar_texto_perfil(df, colunas_perfil)
+    chave_exata = normalizar_texto_perfil(df, list(colunas_exatas)) if colunas_exatas else pd.Series("", index=df.index)
+    codigos, perfis_unicos = pd.factorize(chave_exata + "|" + texto_perfil)
+    chaves_unicas = pd.Series(perfis_unicos).str.split("|", n=1, expand=True)
+    blocos_exatos, textos_unicos = chaves_unicas[0].tolist(), chaves_unicas[1].tolist()
+
+    # 2. Duplicatas aproximadas: MinHash + LSH por bandas, somente entre perfis únicos não vazios
+    pais = np.arange(len(textos_unicos))
+
+    def raiz(indice):
+        while pais[indice] != indice:
+            pais[indice] = pais[pais[indice]]
+            indice = pais[indice]
+        return indice
+
+    indices_nao_vazios = [indice for indice, texto in enumerate(textos_unicos) if texto]
+    assinaturas = calcular_assinaturas_minhash([textos_unicos[i] for i in indices_nao_vazios], num_permutacoes)
+    linhas_por_banda = num_permutacoes // bandas
+    for banda in range(bandas):
+        baldes = {}
+        fatia = assinaturas[:, banda * linhas_por_banda:(banda + 1) * linhas_por_banda]
+        for posicao, indice in enumerate(indices_nao_vazios):
+            chave_balde = (blocos_exatos[indice], fatia[posicao].tobytes())
+            # Cada perfil é comparado ao primeiro do balde: custo linear mesmo em baldes grandes
+            primeiro = baldes.setdefault(chave_balde, posicao)
+            if primeiro != posicao:
+                similaridade = np.mean(assinaturas[primeiro] == assinaturas[posicao])
+                if similaridade >= limiar:
+                    raiz_a, raiz_b = raiz(indices_nao_vazios[primeiro]), raiz(indice)
+                    if raiz_a != raiz_b:
+                        pais[max(raiz_a, raiz_b)] = min(raiz_a, raiz_b)
+
+    raizes_unicas = np.array([raiz(indice) for indice in range(len(textos_unicos))])
+    raizes = raizes_unicas[codigos]
+
+    # Perfis vazios nunca são agrupados entre si
+    perfis_vazios = (texto_perfil == "").to_numpy()
+    ids = df[col_id].astype(str).to_numpy()
+    representante = pd.Series(ids).groupby(raizes).transform("first").to_numpy()
+    df[col_cluster] = np.where(perfis_vazios, ids, representante)
+
+    total = len(df)
+    total_clusters = df[col_cluster].nunique()
+    total_exatos = len(textos_unicos)
+    estatisticas_dedup_perfis.update({
+        "candidatos": total,
+        "perfis_exatos_distintos": total_exatos,
+        "clusters": total_clusters,
+        "fator_reducao": total / total_clusters if total_clusters else 1.0
+    })
+    print(f"Deduplicação de perfis: {total} candidatos -> {total_exatos} perfis exatos distintos -> "
+          f"{total_clusters} clusters (fator de redução: {estatisticas_dedup_perfis['fator_reducao']:.2f}x)")
+    return df
+
+# Função para replicar as features calculadas por cluster a todos os candidatos membros
+def replicar_features_por_cluster(df_membros, df_representantes, col_cluster="id_cluster_perfil"):
+    colunas_novas = [col for col in df_representantes.columns if col not in df_membros.columns]
+    features_cluster = df_representantes[[col_cluster] + colunas_novas]
+    return df_membros.merge(features_cluster, on=col_cluster, how="left")
+
 # Função para realizar pré-limpeza de campos textuais
 def limpar_campos_textuais_candidatos(df, colunas_limpeza, valores_vazios=None):
     if valores_vazios is None:
@@ -243,10 +385,7 @@ def limpar_campos_textuais_candidatos(df, colunas_limpeza, valores_vazios=None):
 def criar_campo_texto_unificado(df, colunas_unificar, coluna_final):
     print(f"Gerando campo '{coluna_final}' de texto unificado para candidatos...")
     if not df.empty:
-        df[coluna_final] = df[colunas_unificar].apply(
-            lambda x: " ".join(str(valor).strip() for valor in x if str(valor).lower() != "não informado"),
-            axis=1
-        ).str.lower().str.strip()
+        df[coluna_final] = concatenar_colunas_texto(df, colunas_unificar, valores_ignorados=("não informado",))
     return df
 
 # Função para engenharia de features (categorias e mapeamentos básicos)
@@ -267,7 +406,9 @@ def engenharia_features_candidatos(df):
         return "Não especificado"
     
     if "titulo_profissional" in df.columns:
-        df["categoria_profissional"] = df["titulo_profissional"].apply(categorizar_profissional)
+        df["categoria_profissional"] = aplicar_por_texto_unico(
+            df["titulo_profissional"], lambda titulos: titulos.map(categorizar_profissional), "categoria_profissional"
+        )
     else:
         df["categoria_profissional"] = "Não especificado"
     
@@ -282,11 +423,19 @@ def engenharia_features_candidatos(df):
 # Função para extrair habilidades/tecnologias de um campo textual
 def extrair_habilidades(df, col_texto, habilidades_techs, sufixo="skill_"):
     if col_texto in df.columns and not df.empty:
-        for habilidade in habilidades_techs:
-            nome_col_habilidade = f"{sufixo}{habilidade.replace(' ', '_').lower()}"
-            df[nome_col_habilidade] = df[col_texto].apply(
-                lambda x: 1 if isinstance(x, str) and re.search(rf"\b{re.escape(habilidade)}\b", x, re.IGNORECASE) else 0
-            )
+        def extrair(textos):
+            marcacoes = pd.DataFrame(index=textos.index)
+            for habilidade in habilidades_techs:
+                nome_col_habilidade = f"{sufixo}{habilidade.replace(' ', '_').lower()}"
+                padrao = rf"\b{re.escape(habilidade)}\b"
+                marcacoes[nome_col_habilidade] = textos.str.contains(padrao, case=False, regex=True).astype(int)
+            return marcacoes
+
+        # Valores não textuais viram "" e, como no comportamento original, não marcam nenhuma habilidade
+        textos = df[col_texto].where(df[col_texto].map(lambda x: isinstance(x, str)), "")
+        marcacoes = aplicar_por_texto_unico(textos, extrair, f"habilidades:{col_texto}")
+        for nome_col_habilidade in marcacoes.columns:
+            df[nome_col_habilidade] = marcacoes[nome_col_habilidade].to_numpy()
     return df
 
 # Execução principal
@@ -300,6 +449,13 @@ if __name__ == "__main__":
     # Transformação JSON em DataFrame
     candidatos_df = preparar_dados_candidatos(dados_json_candidatos)
 
+    # Agrupamento de re-cadastros (perfis idênticos ou quase idênticos)
+    candidatos_df = agrupar_perfis_duplicados(
+        candidatos_df,
+        colunas_perfil=["titulo_profissional", "experiencias_titulos", "experiencias_descricao"],
+        colunas_exatas=["nivel_academico", "nivel_profissional"]
+    )
+
     # Seleção e limpeza de campos importantes
     colunas_textuais = [
         "nome", "email", "local", "titulo_profissional", "nivel_academico", "nivel_profissional",
@@ -307,16 +463,21 @@ if __name__ == "__main__":
     ]
     candidatos_df = limpar_campos_textuais_candidatos(candidatos_df, colunas_textuais)
 
+    # Features calculadas uma única vez por cluster (representante) e replicadas aos membros
+    representantes_df = candidatos_df.drop_duplicates(subset="id_cluster_perfil").copy()
+
     # Combinar campos textuais para NLP
     colunas_unificar = ["experiencias_descricao", "experiencias_titulos", "titulo_profissional"]
-    candidatos_df = criar_campo_texto_unificado(candidatos_df, colunas_unificar, "descricao_completa")
+    representantes_df = criar_campo_texto_unificado(representantes_df, colunas_unificar, "descricao_completa")
 
     # Engenharia de features
-    candidatos_df = engenharia_features_candidatos(candidatos_df)
+    representantes_df = engenharia_features_candidatos(representantes_df)
 
     # Extração de habilidades/tecnologias
     habilidades_chave = ['python', 'java', 'sap', 'sql', 'aws', 'excel', 'jira']
-    candidatos_df = extrair_habilidades(candidatos_df, "descricao_completa", habilidades_chave)
+    representantes_df = extrair_habilidades(representantes_df, "descricao_completa", habilidades_chave)
+
+    candidatos_df = replicar_features_por_cluster(candidatos_df, representantes_df)
 
     # Exportar DataFrame processado
     caminho_csv_final_candidatos = os.path.join(project_paths["dados_processados"], "candidatos_final.csv")
@@ -616,6 +777,176 @@ def recalcular_features_eda(df):
     print("Cálculo de novas features de EDA concluído.")
     return df
 
+# Função para contar frequência de documentos de um bloco de textos (executada em paralelo)
+def _contar_frequencia_documentos(textos, token_pattern):
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    vetorizador = CountVectorizer(binary=True, token_pattern=token_pattern)
+    try:
+        matriz = vetorizador.fit_transform(textos)
+    except ValueError:
+        # Bloco sem nenhum termo (ex.: somente textos vazios)
+        return {}
+    frequencias = np.asarray(matriz.sum(axis=0)).ravel()
+    return dict(zip(vetorizador.get_feature_names_out(), frequencias))
+
+# Função para ajustar o vocabulário TF-IDF em blocos paralelos (artefato persistível via joblib)
+def ajustar_vocabulario_tfidf(textos, max_termos=20000, min_docs=2, tamanho_bloco=5000, n_jobs=-1,
+                              token_pattern=r"(?u)\b\w\w+\b"):
+    from joblib import Parallel, delayed
+
+    textos = pd.Series(textos).fillna("").astype(str).drop_duplicates().tolist()
+    blocos = [textos[i:i + tamanho_bloco] for i in range(0, len(textos), tamanho_bloco)]
+    contagens_blocos = Parallel(n_jobs=n_jobs)(
+        delayed(_contar_frequencia_documentos)(bloco, token_pattern) for bloco in blocos
+    )
+
+    frequencia_documentos = {}
+    for contagem in contagens_blocos:
+        for termo, frequencia in contagem.items():
+            frequencia_documentos[termo] = frequencia_documentos.get(termo, 0) + frequencia
+
+    termos = [termo for termo, frequencia in frequencia_documentos.items() if frequencia >= min_docs]
+    termos = sorted(termos, key=lambda termo: (-frequencia_documentos[termo], termo))[:max_termos]
+    termos.sort()
+
+    # IDF suavizado, mesma fórmula do TfidfTransformer do scikit-learn
+    total_docs = len(textos)
+    frequencias = np.array([frequencia_documentos[termo] for termo in termos], dtype=np.float64)
+    idf = np.log((1 + total_docs) / (1 + frequencias)) + 1
+
+    print(f"Vocabulário TF-IDF ajustado: {len(termos)} termos a partir de {total_docs} textos únicos.")
+    if not termos:
+        print("AVISO: nenhum termo atingiu min_docs; a similaridade textual será 0 para todos os pares.")
+    return {
+        "vocabulario": {termo: indice for indice, termo in enumerate(termos)},
+        "idf": idf,
+        "token_pattern": token_pattern
+    }
+
+# Função para transformar um bloco de textos em vetores TF-IDF normalizados (L2)
+def _transformar_bloco_tfidf(textos, modelo_tfidf):
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.preprocessing import normalize
+    import scipy.sparse as sp
+
+    # Vocabulário vazio (min_docs eliminou todos os termos): vetores nulos em vez de erro do CountVectorizer
+    if not modelo_tfidf["vocabulario"]:
+        return sp.csr_matrix((len(textos), 0))
+    vetorizador = CountVectorizer(vocabulary=modelo_tfidf["vocabulario"], token_pattern=modelo_tfidf["token_pattern"])
+    contagens = vetorizador.transform(textos).astype(np.float64)
+    return normalize(contagens @ sp.diags(modelo_tfidf["idf"]), norm="l2", copy=False).tocsr()
+
+# Função para vetorizar textos em blocos paralelos com um vocabulário já ajustado
+def transformar_textos_tfidf(textos, modelo_tfidf, tamanho_bloco=5000, n_jobs=-1):
+    from joblib import Parallel, delayed
+    import scipy.sparse as sp
+
+    textos = pd.Series(textos).fillna("").astype(str).tolist()
+    if not textos:
+        return sp.csr_matrix((0, len(modelo_tfidf["vocabulario"])))
+    blocos = [textos[i:i + tamanho_bloco] for i in range(0, len(textos), tamanho_bloco)]
+    matrizes = Parallel(n_jobs=n_jobs)(
+        delayed(_transformar_bloco_tfidf)(bloco, modelo_tfidf) for bloco in blocos
+    )
+    return sp.vstack(matrizes, format="csr")
+
+# Função para calcular o hash (determinístico entre processos) dos textos de cada entidade
+def hash_textos(textos):
+    return pd.util.hash_pandas_object(pd.Series(textos).fillna("").astype(str), index=False).to_numpy()
+
+# Função para manter cache de vetores TF-IDF por entidade (vaga ou candidato), chaveado por (id, hash do texto)
+def atualizar_cache_vetores(cache, ids, textos, modelo_tfidf, n_jobs=-1):
+    import scipy.sparse as sp
+
+    if cache is None:
+        cache = {"posicoes": {}, "hashes": {}, "matriz": sp.csr_matrix((0, len(modelo_tfidf["vocabulario"])))}
+
+    entidades = pd.DataFrame({"id": pd.Series(ids).astype(str).to_numpy(), "texto": pd.Series(textos).to_numpy()})
+    entidades = entidades.drop_duplicates(subset="id", keep="last")
+    entidades["hash"] = hash_textos(entidades["texto"])
+    alteradas = [cache["hashes"].get(id_entidade) != int(hash_texto)
+                 for id_entidade, hash_texto in zip(entidades["id"], entidades["hash"])]
+    novas = entidades.loc[np.array(alteradas, dtype=bool)]
+
+    # Apenas entidades não vistas ou com texto alterado são (re)transformadas
+    if not novas.empty:
+        matriz_novas = transformar_textos_tfidf(novas["texto"], modelo_tfidf, n_jobs=n_jobs)
+        # Compacta a matriz: a linha antiga de um texto alterado é descartada (sem linhas órfãs no cache salvo)
+        ids_novos = set(novas["id"])
+        ids_mantidos = [id_entidade for id_entidade in cache["posicoes"] if id_entidade not in ids_novos]
+        matriz_mantida = cache["matriz"][[cache["posicoes"][id_entidade] for id_entidade in ids_mantidos]]
+        cache["posicoes"] = {id_entidade: linha for linha, id_entidade in enumerate(ids_mantidos)}
+        inicio = len(ids_mantidos)
+        for deslocamento, (id_entidade, hash_texto) in enumerate(zip(novas["id"], novas["hash"])):
+            cache["posicoes"][id_entidade] = inicio + deslocamento
+            cache["hashes"][id_entidade] = int(hash_texto)
+        cache["matriz"] = sp.vstack([matriz_mantida, matriz_novas], format="csr")
+    print(f"Cache de vetores: {len(novas)} entidades (re)transformadas, {len(cache['posicoes'])} em cache.")
+    return cache
+
+# Função para calcular a similaridade cosseno de pares (vaga, candidato) em blocos de memória limitada
+def similaridade_pares_em_blocos(cache_vagas, cache_candidatos, ids_vagas, ids_candidatos, tamanho_bloco=50000):
+    posicoes_vagas = pd.Series(ids_vagas).astype(str).map(cache_vagas["posicoes"])
+    posicoes_cand = pd.Series(ids_candidatos).astype(str).map(cache_candidatos["posicoes"])
+    validos = (posicoes_vagas.notna() & posicoes_cand.notna()).to_numpy()
+
+    similaridades = np.zeros(len(validos), dtype=np.float64)
+    indices_validos = np.flatnonzero(validos)
+    linhas_vagas = posicoes_vagas.to_numpy()[validos].astype(np.int64)
+    linhas_cand = posicoes_cand.to_numpy()[validos].astype(np.int64)
+
+    for inicio in range(0, len(indices_validos), tamanho_bloco):
+        fim = inicio + tamanho_bloco
+        bloco_vagas = cache_vagas["matriz"][linhas_vagas[inicio:fim]]
+        bloco_cand = cache_candidatos["matriz"][linhas_cand[inicio:fim]]
+        # Vetores já normalizados: produto escalar linha a linha = cosseno
+        similaridades[indices_validos[inicio:fim]] = np.asarray(bloco_vagas.multiply(bloco_cand).sum(axis=1)).ravel()
+    return similaridades
+
+# Função para encontrar os top-N candidatos mais similares de cada vaga (todos os pares, em blocos)
+def top_n_similares_em_blocos(cache_vagas, cache_candidatos, n=50, tamanho_bloco=256):
+    # Linhas selecionadas pelas posições do cache: a ordem dos ids acompanha exatamente as linhas usadas
+    ids_vagas = list(cache_vagas["posicoes"])
+    ids_cand = np.array(list(cache_candidatos["posicoes"]), dtype=object)
+    matriz_vagas = cache_vagas["matriz"][[cache_vagas["posicoes"][id_vaga] for id_vaga in ids_vagas]]
+    matriz_cand_t = cache_candidatos["matriz"][[cache_candidatos["posicoes"][id_cand] for id_cand in ids_cand]].T.tocsc()
+    n = min(n, len(ids_cand))
+
+    resultados = []
+    for inicio in range(0, matriz_vagas.shape[0] if n else 0, tamanho_bloco):
+        # Bloco denso de no máximo tamanho_bloco x total de candidatos
+        bloco = (matriz_vagas[inicio:inicio + tamanho_bloco] @ matriz_cand_t).toarray()
+        top = np.argpartition(-bloco, n - 1, axis=1)[:, :n]
+        for deslocamento, colunas in enumerate(top):
+            pontuacoes = bloco[deslocamento, colunas]
+            ordem = np.argsort(-pontuacoes)
+            resultados.append(pd.DataFrame({
+                "id_vaga": ids_vagas[inicio + deslocamento],
+                "id_candidato": ids_cand[colunas[ordem]],
+                "similaridade_texto": pontuacoes[ordem]
+            }))
+    if not resultados:
+        return pd.DataFrame(columns=["id_vaga", "id_candidato", "similaridade_texto"])
+    return pd.concat(resultados, ignore_index=True)
+
+# Função para adicionar a feature de similaridade textual vaga x candidato ao DataFrame combinado
+def adicionar_similaridade_textual(df, modelo_tfidf, cache_vagas=None, cache_candidatos=None,
+                                   col_id_vaga='id_vaga_origem', col_id_cand='id_candidato_origem',
+                                   col_texto_vaga='descricao_unificada', col_texto_cand='descricao_completa'):
+    colunas_necessarias = [col_id_vaga, col_id_cand, col_texto_vaga, col_texto_cand]
+    if df.empty or any(coluna not in df.columns for coluna in colunas_necessarias):
+        print("Colunas de texto/identificadores ausentes. Similaridade textual definida como 0.")
+        df['similaridade_texto'] = 0.0
+        return df, cache_vagas, cache_candidatos
+
+    cache_vagas = atualizar_cache_vetores(cache_vagas, df[col_id_vaga], df[col_texto_vaga], modelo_tfidf)
+    cache_candidatos = atualizar_cache_vetores(cache_candidatos, df[col_id_cand], df[col_texto_cand], modelo_tfidf)
+    df['similaridade_texto'] = similaridade_pares_em_blocos(
+        cache_vagas, cache_candidatos, df[col_id_vaga], df[col_id_cand]
+    )
+    return df, cache_vagas, cache_candidatos
+
 # Função para preparar conjunto de features finais
 def preparar_features_modelagem(df, categoricas_vaga, categoricas_cand, target_col):
     if df.empty or target_col not in df.columns:
@@ -682,13 +1013,26 @@ if not df_modelagem.empty:
     # Recalcular features exploratórias
     df_modelagem = recalcular_features_eda(df_modelagem)
 
+    # Dividir em conjuntos de treino (70%) e teste (30%) antes de ajustar o vocabulário, para evitar vazamento
+    indices_treino, indices_teste = train_test_split(
+        df_modelagem.index, test_size=0.3, random_state=42, stratify=df_modelagem['foi_contratado']
+    )
+
+    # Similaridade textual TF-IDF entre descrição da vaga e do candidato (vocabulário/IDF apenas do treino)
+    linhas_treino = df_modelagem.loc[indices_treino]
+    textos_vocabulario = pd.concat([
+        linhas_treino.get('descricao_unificada', pd.Series(dtype=str)),
+        linhas_treino.get('descricao_completa', pd.Series(dtype=str))
+    ])
+    modelo_tfidf = ajustar_vocabulario_tfidf(textos_vocabulario)
+    df_modelagem, cache_vetores_vagas, cache_vetores_candidatos = adicionar_similaridade_textual(df_modelagem, modelo_tfidf)
+
     # Prepara as features
     features_categoricas_vaga = ['modalidade_trabalho', 'categoria_vaga']
     features_categoricas_cand = ['categoria_profissional', 'nivel_academico_padronizado']
     X, y = preparar_features_modelagem(df_modelagem, features_categoricas_vaga, features_categoricas_cand, 'foi_contratado')
-
-    # Dividir em conjuntos de treino (70%) e teste (30%)
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
+    X_train, X_test = X.loc[indices_treino], X.loc[indices_teste]
+    y_train, y_test = y.loc[indices_treino], y.loc[indices_teste]
 
     # Treina e avalia modelos baseline com LightGBM
     resultados_baseline = treinar_avaliar_modelos_baseline(X_train, X_test, y_train, y_test)
@@ -709,6 +1053,42 @@ def salvar_artefato_joblib(objeto, caminho, descricao="Artefato"):
         print(f"Erro ao salvar {descricao}: {e}")
 
 
+# Função para verificar se uma coluna é identificador/código (nunca publicada como feature numérica)
+def eh_coluna_identificador(coluna):
+    coluna = coluna.lower()
+    return coluna.startswith(("id_", "identificador", "identificacao")) or "codigo" in coluna or "cluster" in coluna
+
+# Função para publicar as colunas de features numéricas de um DataFrame em arquivos .npy mapeáveis em memória
+# (os processos do painel anexam somente leitura via np.load(mmap_mode='r') e compartilham as páginas do SO)
+def publicar_matriz_compartilhada(df, col_id, diretorio, nome, colunas_modelo):
+    os.makedirs(diretorio, exist_ok=True)
+    # Somente features do modelo; identificadores permanecem no CSV (float32 perde precisão acima de 2^24)
+    colunas_numericas = [
+        col for col in df.columns
+        if col in colunas_modelo and col != col_id and not eh_coluna_identificador(col)
+        and pd.api.types.is_numeric_dtype(df[col])
+    ]
+    matriz = np.ascontiguousarray(df[colunas_numericas].to_numpy(dtype=np.float32, na_value=np.nan))
+    ids = df[col_id].astype(str).to_numpy(dtype=str) if col_id in df.columns else np.arange(len(df)).astype(str)
+
+    # Escrita em arquivo temporário + os.replace: réplicas nunca anexam um arquivo parcial
+    arquivos = {
+        f"{nome}_matriz.npy": matriz,
+        f"{nome}_ids.npy": ids
+    }
+    for arquivo, dados in arquivos.items():
+        caminho_tmp = os.path.join(diretorio, f".{arquivo}.tmp")
+        with open(caminho_tmp, 'wb') as saida:
+            np.save(saida, dados)
+        os.replace(caminho_tmp, os.path.join(diretorio, arquivo))
+
+    caminho_meta = os.path.join(diretorio, f"{nome}_meta.json")
+    with open(caminho_meta + ".tmp", 'w', encoding='utf-8') as saida:
+        json.dump({"colunas": colunas_numericas, "col_id": col_id, "linhas": len(df)}, saida)
+    os.replace(caminho_meta + ".tmp", caminho_meta)
+    print(f"Matriz compartilhada '{nome}' publicada: {matriz.shape[0]} linhas x {matriz.shape[1]} colunas.")
+
+
 # Função para salvar artefatos necessários para o Streamlit
 def salvar_artefatos_para_streamlit(df_vagas, df_candidatos, df_tp, df_tn, modelo, colunas, artefatos):
     print("\n--- Iniciando Salvamento de Artefatos para Streamlit ---")
@@ -717,6 +1097,13 @@ def salvar_artefatos_para_streamlit(df_vagas, df_candidatos, df_tp, df_tn, model
     salvar_dataframe_para_csv(df_vagas, os.path.join(path_data_processed, 'vagas_processadas.csv'), "Dados de Vagas Processadas")
     salvar_dataframe_para_csv(df_candidatos, os.path.join(path_data_processed, 'candidatos_processados.csv'), "Dados de Candidatos Processados")
 
+    # Publicando matrizes numéricas para anexação zero-cópia pelos processos do painel
+    diretorio_compartilhado = os.path.join(path_artifacts, 'compartilhado')
+    if not df_vagas.empty:
+        publicar_matriz_compartilhada(df_vagas, 'id_vaga', diretorio_compartilhado, 'vagas', colunas or [])
+    if not df_candidatos.empty:
+        publicar_matriz_compartilhada(df_candidatos, 'id_candidato', diretorio_compartilhado, 'candidatos', colunas or [])
+
     # Salvando modelo otimizado
     salvar_artefato_joblib(modelo, os.path.join(path_artifacts, 'modelo_recrutamento_rf.joblib'), "Modelo Random Forest Otimizado")
 
@@ -727,6 +1114,21 @@ def salvar_artefatos_para_streamlit(df_vagas, df_candidatos, df_tp, df_tn, model
     # Salvando artefatos auxiliares para engenharia de features no Streamlit
     salvar_artefato_joblib(artefatos, os.path.join(path_artifacts, 'artefatos_engenharia.joblib'), "Artefatos de Engenharia de Features")
 
+    # Salvando vocabulário TF-IDF e caches de vetores por entidade (novos candidatos só precisam do próprio transform)
+    if 'modelo_tfidf' in globals():
+        salvar_artefato_joblib(modelo_tfidf, os.path.join(path_artifacts, 'vocabulario_tfidf.joblib'), "Vocabulário TF-IDF")
+        salvar_artefato_joblib(
+            {'vagas': cache_vetores_vagas, 'candidatos': cache_vetores_candidatos},
+            os.path.join(path_artifacts, 'cache_vetores_tfidf.joblib'),
+            "Cache de Vetores TF-IDF"
+        )
+        # Pré-seleção por texto para uso em todos os pares: apenas os N candidatos mais similares de cada vaga
+        salvar_dataframe_para_csv(
+            top_n_similares_em_blocos(cache_vetores_vagas, cache_vetores_candidatos),
+            os.path.join(path_artifacts, 'top_similares_tfidf.csv'),
+            "Top-N Candidatos Similares por Vaga (TF-IDF)"
+        )
+
     # Salvando exemplos (TP e TN) para uso no Streamlit
     salvar_dataframe_para_csv(df_tp, os.path.join(path_artifacts, 'exemplo_tp_streamlit.csv'), "Exemplo de Verdadeiro Positivo (TP)")
     salvar_dataframe_para_csv(df_tn, os.path.join(path_artifacts, 'exemplo_tn_streamlit.csv'), "Exemplo de Verdadeiro Negativo (TN)")